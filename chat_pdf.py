@@ -1,23 +1,85 @@
+def extract_text_layer(file_path, min_chars_per_page=200):
+    """Return the pdf's embedded text if it is born-digital, else None.
+
+    A scan has no (or nearly no) text layer, so anything averaging more
+    than ``min_chars_per_page`` extractable chars per page does not need
+    the OCR model at all.
+
+    pdfium is not thread-safe, so the whole probe runs under the same
+    process-wide lock the render pipeline uses.
+    """
+    import pypdfium2
+    from langchain.document_loaders.parsers.pdf import _PDFIUM_LOCK
+
+    with _PDFIUM_LOCK:
+        pdf = pypdfium2.PdfDocument(file_path)
+        try:
+            pages = []
+            for page in pdf:
+                text_page = page.get_textpage()
+                pages.append(text_page.get_text_range())
+                text_page.close()
+                page.close()
+            total = sum(len(p) for p in pages)
+            if pages and total / len(pages) > min_chars_per_page:
+                return '\n\n'.join(pages) + '\n\n'
+            return None
+        finally:
+            pdf.close()
+
+
 def process_pdf(device, q):
-    import json, os
+    import json, os, queue
+    import torch
     from langchain.document_loaders import Pix2TextLoader
     print("Start ocr process on device : " + str(device))
-    os.environ['CUDA_VISIBLE_DEVICES'] = device
+    # Pin once before any model work; fail loudly rather than silently
+    # piling every worker onto device 0.
+    torch.cuda.set_device(int(device))
+    assert torch.cuda.current_device() == int(device)
     loader = Pix2TextLoader("./1685435898.9404118_herd-scharfstein.pdf", device=device)
     while True:
-        loader.file_path = q.get() # 接收新的pdf路径
+        try:
+            loader.file_path = q.get(timeout=1.0) # 接收新的pdf路径
+        except queue.Empty:
+            continue
         if loader.file_path is None:
             return
         import time
         start = time.time()
-        documents = loader.load()
+        out_path = os.path.join("ocr_results", os.path.split(loader.file_path)[1] + '.json')
+        # Write to a temp name and rename on success: a crash mid-document
+        # must not leave a truncated .json that the done-set filter would
+        # treat as finished on the next run.
+        tmp_path = out_path + '.tmp'
+        try:
+            # 生成型 pdf 自带文字层，直接抽取，OCR 只留给扫描件。
+            s = extract_text_layer(loader.file_path)
+            if s is not None:
+                # orjson escape-scans the body with SIMD; stdlib json is the fallback.
+                try:
+                    import orjson
+                    payload = orjson.dumps(s)
+                except ImportError:
+                    payload = json.dumps(s).encode('utf-8')
+                with open(tmp_path, 'wb') as f:
+                    f.write(payload)
+            else:
+                # Stream pages straight to disk as one JSON string; only a single
+                # page's text is ever resident instead of the whole document.
+                escape = json.encoder.encode_basestring_ascii
+                with open(tmp_path, 'w') as f:
+                    f.write('"')
+                    for doc in loader.lazy_load():
+                        f.write(escape(doc.page_content)[1:-1])
+                        f.write('\\n\\n')
+                    f.write('"')
+            os.replace(tmp_path, out_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
         end = time.time()
-        with open(os.path.join("ocr_results", os.path.split(loader.file_path)[1] + '.json'), 'w') as f:
-            s = ''
-            for doc in documents:
-                s += doc.page_content
-                s += '\n\n'
-            json.dump(s, f)
         print(loader.file_path + " used " + str(end - start) + " secs.")
 
 def parse_command():
@@ -29,37 +91,42 @@ def parse_command():
 
 if __name__ == "__main__":
     import os
-    from multiprocessing import Process, Queue
-    from itertools import cycle
+    import queue
+    from concurrent.futures import ThreadPoolExecutor
 
     pdf_directory = "/pdfs/"
-    pdf_files = [os.path.join(pdf_directory, f) for f in os.listdir(pdf_directory) if f.endswith('.pdf')]
-    pdf_files = [f for f in pdf_files if not os.path.exists(os.path.join("ocr_results", os.path.split(f)[1] + '.json'))]
+    pdf_files = [entry.path for entry in os.scandir(pdf_directory) if entry.name.endswith('.pdf')]
+    # One directory listing instead of a stat() per pdf.
+    if os.path.isdir("ocr_results"):
+        done = {entry.name for entry in os.scandir("ocr_results")}
+    else:
+        done = set()
+    pdf_files = [f for f in pdf_files if os.path.basename(f) + '.json' not in done]
 
     devices = parse_command()
     procs = len(devices)
 
     import time
     start = time.time()
-    q_list = []
-    workers = []
-    for i in range(procs):
-        q = Queue()
-        q_list.append(q)
-        worker = Process(target=process_pdf, args=(devices.pop(), q))
-        workers.append(worker)
-        worker.start()
-    # tasks.
-    for file_path, queue in zip(pdf_files, cycle(q_list)):
-        queue.put(file_path)
-    
-    # close.
-    for queue in q_list:
-        queue.put(None)
-    
-    for worker in workers:
-        worker.join()
-    
+    # One process, one worker thread per device: the GIL is released during
+    # GPU kernels and pdfium rendering, so threads keep every device busy
+    # without paying interpreter + weight-loading cost per device. Workers
+    # still self-pull from one shared queue, so a long pdf on one device
+    # does not leave the others idle.
+    q = queue.Queue()
+    with ThreadPoolExecutor(max_workers=procs) as executor:
+        futures = [executor.submit(process_pdf, devices.pop(), q) for _ in range(procs)]
+        # tasks.
+        for file_path in pdf_files:
+            q.put(file_path)
+
+        # close.
+        for _ in range(procs):
+            q.put(None)
+
+        for future in futures:
+            future.result()
+
     end = time.time()
     print("Total : " + str(end - start) + " secs.")
 
@@ -1,4 +1,5 @@
 """Module contains common parsers for PDFs."""
+import threading
 import time
 from typing import Any, Iterator, Mapping, Optional, Union
 import cv2
@@ -6,6 +7,49 @@ from langchain.document_loaders.base import BaseBlobParser
 from langchain.document_loaders.blob_loaders import Blob
 from langchain.schema import Document
 
+# pdfium is not thread-safe: concurrent FPDF_* calls are undefined behavior
+# even on different documents. Every pdfium call in this process must hold
+# this lock; rendering stays serialized while OCR on other threads proceeds.
+_PDFIUM_LOCK = threading.Lock()
+
+
+_PYPDF_POOL_READER = None
+
+
+def _pypdf_pool_init(data: bytes, password: Optional[Union[str, bytes]]) -> None:
+    """Open the pdf once per pool worker."""
+    global _PYPDF_POOL_READER
+    import io
+
+    import pypdf
+
+    _PYPDF_POOL_READER = pypdf.PdfReader(io.BytesIO(data), password=password)
+
+
+def _pypdf_extract_page(page_number: int) -> str:
+    return _PYPDF_POOL_READER.pages[page_number].extract_text()
+
+
+_PDFPLUMBER_POOL_DOC = None
+_PDFPLUMBER_POOL_KWARGS: Mapping[str, Any] = {}
+
+
+def _pdfplumber_pool_init(data: bytes, text_kwargs: Mapping[str, Any]) -> None:
+    """Open the pdf once per pool worker."""
+    global _PDFPLUMBER_POOL_DOC, _PDFPLUMBER_POOL_KWARGS
+    import io
+
+    import pdfplumber
+
+    _PDFPLUMBER_POOL_DOC = pdfplumber.open(io.BytesIO(data))
+    _PDFPLUMBER_POOL_KWARGS = text_kwargs
+
+
+def _pdfplumber_extract_page(page_index: int) -> str:
+    return _PDFPLUMBER_POOL_DOC.pages[page_index].extract_text(
+        **_PDFPLUMBER_POOL_KWARGS
+    )
+
 
 class PyPDFParser(BaseBlobParser):
     """Loads a PDF with pypdf and chunks at character level."""
@@ -15,17 +59,25 @@ class PyPDFParser(BaseBlobParser):
 
     def lazy_parse(self, blob: Blob) -> Iterator[Document]:
         """Lazily parse the blob."""
+        from multiprocessing import Pool
+
         import pypdf
 
         with blob.as_bytes_io() as pdf_file_obj:
             pdf_reader = pypdf.PdfReader(pdf_file_obj, password=self.password)
-            yield from [
-                Document(
-                    page_content=page.extract_text(),
+            num_pages = len(pdf_reader.pages)
+
+        # pypdf extraction is pure Python and GIL-bound, so pages are spread
+        # over a process pool; each worker parses the document once.
+        data = blob.as_bytes()
+        with Pool(initializer=_pypdf_pool_init, initargs=(data, self.password)) as pool:
+            for page_number, text in enumerate(
+                pool.imap(_pypdf_extract_page, range(num_pages))
+            ):
+                yield Document(
+                    page_content=text,
                     metadata={"source": blob.source, "page": page_number},
                 )
-                for page_number, page in enumerate(pdf_reader.pages)
-            ]
 
 
 class PDFMinerParser(BaseBlobParser):
@@ -59,25 +111,19 @@ class PyMuPDFParser(BaseBlobParser):
         with blob.as_bytes_io() as file_path:
             doc = fitz.open(file_path)  # open document
 
-            yield from [
-                Document(
+            # Document-level metadata does not change per page; build it once.
+            base_metadata = {
+                k: v for k, v in doc.metadata.items() if isinstance(v, (str, int))
+            }
+            base_metadata["source"] = blob.source
+            base_metadata["file_path"] = blob.source
+            base_metadata["total_pages"] = len(doc)
+
+            for page in doc:
+                yield Document(
                     page_content=page.get_text(**self.text_kwargs),
-                    metadata=dict(
-                        {
-                            "source": blob.source,
-                            "file_path": blob.source,
-                            "page": page.number,
-                            "total_pages": len(doc),
-                        },
-                        **{
-                            k: doc.metadata[k]
-                            for k in doc.metadata
-                            if type(doc.metadata[k]) in [str, int]
-                        },
-                    ),
+                    metadata={**base_metadata, "page": page.number},
                 )
-                for page in doc
-            ]
 
 
 class PyPDFium2Parser(BaseBlobParser):
@@ -98,19 +144,25 @@ class PyPDFium2Parser(BaseBlobParser):
         import pypdfium2
 
         # pypdfium2 is really finicky with respect to closing things,
-        # if done incorrectly creates seg faults.
+        # if done incorrectly creates seg faults. The lock is released while
+        # yielding so consumers never stall other pdfium users.
         with blob.as_bytes_io() as file_path:
-            pdf_reader = pypdfium2.PdfDocument(file_path, autoclose=True)
+            with _PDFIUM_LOCK:
+                pdf_reader = pypdfium2.PdfDocument(file_path, autoclose=True)
+                num_pages = len(pdf_reader)
             try:
-                for page_number, page in enumerate(pdf_reader):
-                    text_page = page.get_textpage()
-                    content = text_page.get_text_range()
-                    text_page.close()
-                    page.close()
+                for page_number in range(num_pages):
+                    with _PDFIUM_LOCK:
+                        page = pdf_reader[page_number]
+                        text_page = page.get_textpage()
+                        content = text_page.get_text_range()
+                        text_page.close()
+                        page.close()
                     metadata = {"source": blob.source, "page": page_number}
                     yield Document(page_content=content, metadata=metadata)
             finally:
-                pdf_reader.close()
+                with _PDFIUM_LOCK:
+                    pdf_reader.close()
 
 
 class PDFPlumberParser(BaseBlobParser):
@@ -126,35 +178,125 @@ class PDFPlumberParser(BaseBlobParser):
 
     def lazy_parse(self, blob: Blob) -> Iterator[Document]:
         """Lazily parse the blob."""
+        from multiprocessing import Pool
+
         import pdfplumber
 
         with blob.as_bytes_io() as file_path:
             doc = pdfplumber.open(file_path)  # open document
-
-            yield from [
-                Document(
-                    page_content=page.extract_text(**self.text_kwargs),
-                    metadata=dict(
-                        {
-                            "source": blob.source,
-                            "file_path": blob.source,
-                            "page": page.page_number,
-                            "total_pages": len(doc.pages),
-                        },
-                        **{
-                            k: doc.metadata[k]
-                            for k in doc.metadata
-                            if type(doc.metadata[k]) in [str, int]
-                        },
-                    ),
+            page_numbers = [page.page_number for page in doc.pages]
+
+            # Document-level metadata does not change per page; build it once.
+            base_metadata = {
+                k: v for k, v in doc.metadata.items() if isinstance(v, (str, int))
+            }
+            base_metadata["source"] = blob.source
+            base_metadata["file_path"] = blob.source
+            base_metadata["total_pages"] = len(page_numbers)
+
+        # pdfplumber extraction is GIL-bound; spread pages over a process
+        # pool, with each worker opening the document once.
+        data = blob.as_bytes()
+        with Pool(
+            initializer=_pdfplumber_pool_init, initargs=(data, self.text_kwargs)
+        ) as pool:
+            for page_number, text in zip(
+                page_numbers,
+                pool.imap(_pdfplumber_extract_page, range(len(page_numbers))),
+            ):
+                yield Document(
+                    page_content=text,
+                    metadata={**base_metadata, "page": page_number},
                 )
-                for page in doc.pages
-            ]
+
+
+def _order_body(outs: list) -> list:
+    """Return the body block texts in reading order.
+
+    单列版面 vs 双列版面：当我们从左向右、从上到下地遍历文档时，
+    双列版面中那些在版面中线右边的 box 应当暂时保留，直到遇到一个
+    横跨中线的 box，才接到左列之后输出。
+
+    The boxes are held as structure-of-arrays (x0, y0, x1 columns), so
+    the midline-crossing test is one vectorized comparison and the
+    two-column reorder is a single lexsort over (band, column, y).
+    """
+    import numpy as np
+
+    texts = [out['text'] for out in outs]
+    if len(outs) < 4 or any('position' not in out for out in outs):
+        return texts
+
+    # positions are corner points (4, 2); reshape also covers flat
+    # (x0, y0, x1, y1) boxes.
+    pos = np.asarray(
+        [np.asarray(out['position'], dtype=np.float32).reshape(-1, 2)
+         for out in outs])
+    x0 = pos[:, :, 0].min(axis=1)
+    x1 = pos[:, :, 0].max(axis=1)
+    y0 = pos[:, :, 1].min(axis=1)
+
+    midline = (x0.min() + x1.max()) / 2
+    crosses = (x0 < midline) & (x1 > midline)
+    right = ~crosses & (x0 >= midline)
+    left = ~crosses & ~right
+    if right.sum() < 2 or left.sum() < 2:
+        # effectively single-column; keep the model's order
+        return texts
+
+    # A crossing box opens a new full-width band; within a band the left
+    # column reads before the right one, top to bottom.
+    band = np.cumsum(crosses)
+    order = np.lexsort((y0, right, band))
+    return [texts[i] for i in order]
+
+
+_P2T_CACHE: dict = {}
+
+
+def _get_p2t(device: str) -> Any:
+    """Return the process-wide Pix2Text instance for ``device``.
+
+    Loading the model pays for CUDA context creation and weight transfer,
+    so it is done once per device and shared by every parser instance.
+    """
+    import contextlib
+
+    import torch
+    from pix2text import Pix2Text
+
+    if device not in _P2T_CACHE:
+        # Construct under the target device so internal .cuda() calls during
+        # init allocate there, whatever device the calling thread had current.
+        if torch.cuda.is_available():
+            device_ctx = torch.cuda.device(torch.device(device))
+        else:
+            device_ctx = contextlib.nullcontext()
+        with device_ctx:
+            _P2T_CACHE[device] = Pix2Text(
+                analyzer_config=dict(model_name='mfd'),
+                general_config=dict(rec_model_backend='pytorch', det_model_backend='pytorch'),
+                device=device)
+    return _P2T_CACHE[device]
 
 
 class Pix2TextParser(BaseBlobParser):
-    def __init__(self) -> None:
-        """Initialize the parser."""
+    def __init__(
+        self,
+        render_long_edge: int = 1400,
+        device: str = 'cuda',
+    ) -> None:
+        """Initialize the parser.
+
+        Args:
+            render_long_edge: Target long edge of the rendered page in
+                pixels. The model resizes its input to ``resized_shape=700``,
+                so 2x oversampling is plenty; a fixed 300 dpi render of an A4
+                page would produce ~5x more pixels only to throw them away.
+            device: Torch device the OCR model runs on, e.g. ``"cuda:1"``.
+                Passed explicitly so several parsers can drive different
+                devices from one process.
+        """
         try:
             from pix2text import Pix2Text  # noqa:F401
         except ImportError:
@@ -163,49 +305,114 @@ class Pix2TextParser(BaseBlobParser):
                 " `pip install pix2text`"
             )
 
-        self.p2t = Pix2Text(
-            analyzer_config=dict(model_name='mfd'),
-            general_config=dict(rec_model_backend='pytorch', det_model_backend='pytorch'),
-            device='cuda')
+        self.render_long_edge = render_long_edge
+        self.device = device
 
     def lazy_parse(self, blob: Blob) -> Iterator[Document]:
         """Lazily parse the blob."""
-        import fitz, os
+        import queue
+        from concurrent.futures import ThreadPoolExecutor
+
+        import pypdfium2
+
+        self.p2t = _get_p2t(self.device)
 
         file_path = blob.path
-        doc = fitz.open(file_path)
-        pdf_name_ext = os.path.basename(file_path)
-        pdf_name = os.path.splitext(pdf_name_ext)[0]
-
-        for idx, page in enumerate(doc):
-            pix = page.get_pixmap(dpi=300)  # render page to an image
-            pix.save(pdf_name + '_page_' + str(idx) + '.png')
-
-            outs = self.p2t(pdf_name + '_page_' + str(idx) + '.png', resized_shape=700)
-
-            header_text = ''
-            footer_text = ''
-            body_text = ''
-
-            for out in outs:
-                if out['type'] == 'Footer':
-                    footer_text += out['text']
-                elif out['type'] == 'Header':
-                    header_text += out['text']
-                elif out['type'] == 'Reference':
-                    continue
-                else:
-                    body_text += out['text']
-
-            only_text = header_text + '\n\n' + body_text + '\n\n' + footer_text + '\n\n'
-
-            # 在这里处理单列版面 vs 双列版面。
-            # 二者唯一的区别是，当我们从左向右，从上到下地遍历文档时。
-            # 双列版面中，那些在版面中线右边的 box 应当暂时保留在 cache 中，直到遇到一个横跨中线的 box，才清空 cache
-
-            os.remove(pdf_name + '_page_' + str(idx) + '.png')
-
-            yield Document(
-                page_content=only_text,
-                metadata={'source': blob.source, "page": idx + 1}
-            )
\ No newline at end of file
+        with _PDFIUM_LOCK:
+            doc = pypdfium2.PdfDocument(file_path)
+            num_pages = len(doc)
+
+        # Rendering is CPU-bound and OCR is GPU-bound, so a render thread
+        # feeding a bounded queue lets the two stages overlap instead of
+        # running strictly back to back per page.
+        rendered: queue.Queue = queue.Queue(maxsize=4)
+        sentinel = object()
+
+        def _render() -> None:
+            try:
+                for idx in range(num_pages):
+                    # pdfium hands the raw raster back as an RGB ndarray, so
+                    # no PNG round trip. Scale per page size so the long edge
+                    # lands on render_long_edge rather than a fixed 300 dpi,
+                    # since the model downscales its input anyway. All pdfium
+                    # work sits under the lock; the copy lets the bitmap be
+                    # released before the lock is.
+                    with _PDFIUM_LOCK:
+                        page = doc[idx]
+                        width, height = page.get_size()
+                        scale = self.render_long_edge / max(width, height)
+                        bitmap = page.render(scale=scale, rev_byteorder=True)
+                        img = bitmap.to_numpy().copy()
+                        bitmap.close()
+                        page.close()
+                    rendered.put((idx, img))
+            finally:
+                rendered.put(sentinel)
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        render_future = executor.submit(_render)
+        try:
+            # The model only takes one image per call, so pages go to OCR as
+            # soon as they leave the render queue; grouping them first would
+            # only delay time-to-first-page and pin extra rasters in memory.
+            while True:
+                item = rendered.get()
+                if item is sentinel:
+                    break
+                idx, img = item
+                yield self._ocr_page(blob, idx, img)
+            render_future.result()  # surface rendering errors
+        finally:
+            # If consumption stopped early, drain so the producer can finish
+            # instead of blocking forever on the bounded queue.
+            while not render_future.done():
+                try:
+                    rendered.get(timeout=0.01)
+                except queue.Empty:
+                    pass
+            executor.shutdown(wait=True)
+            with _PDFIUM_LOCK:
+                doc.close()
+
+    def _ocr_page(self, blob: Blob, idx: int, img: Any) -> Document:
+        """Run OCR over one rendered page and build its Document."""
+        import collections
+        import contextlib
+
+        import torch
+
+        # Recognition is accuracy-tolerant of reduced precision; bf16 halves
+        # weight/activation traffic and doubles tensor-core throughput. The
+        # device context keeps every kernel on the parser's own gpu even if
+        # the calling thread never pinned one.
+        if torch.cuda.is_available():
+            autocast = torch.autocast(device_type='cuda', dtype=torch.bfloat16)
+            device_ctx = torch.cuda.device(torch.device(self.device))
+        else:
+            autocast = contextlib.nullcontext()
+            device_ctx = contextlib.nullcontext()
+
+        with device_ctx, autocast:
+            outs = self.p2t(img, resized_shape=700)
+
+        # Single hash-dispatched pass over the blocks; the branchy if/elif
+        # chain over type strings goes away and Reference blocks are simply
+        # never joined.
+        buckets: dict = collections.defaultdict(list)
+        for out in outs:
+            buckets[out['type']].append(out)
+
+        body_outs = [
+            o for k, v in buckets.items()
+            if k not in ('Header', 'Footer', 'Reference') for o in v
+        ]
+        header_parts = [o['text'] for o in buckets.get('Header', ())]
+        footer_parts = [o['text'] for o in buckets.get('Footer', ())]
+        only_text = (''.join(header_parts) + '\n\n'
+                     + ''.join(_order_body(body_outs)) + '\n\n'
+                     + ''.join(footer_parts) + '\n\n')
+
+        return Document(
+            page_content=only_text,
+            metadata={'source': blob.source, "page": idx + 1}
+        )
\ No newline at end of file
@@ -400,7 +400,12 @@ class Pix2TextLoader(BasePDFLoader):
     """Loader that uses Pix2Text to load PDF files."""
 
     def __init__(self, file_path: str, device='0') -> None:
-        """Initialize with file path"""
+        """Initialize with file path.
+
+        ``device`` is a CUDA ordinal ("1") and is passed to the parser as an
+        explicit torch device, so several loaders can share one process while
+        driving different GPUs.
+        """
         try:
             from pix2text import Pix2Text
         except ImportError:
@@ -410,10 +415,14 @@ class Pix2TextLoader(BasePDFLoader):
             )
 
         super().__init__(file_path)
-        os.environ['CUDA_VISIBLE_DEVICES'] = device
-        self.parser = Pix2TextParser()
+        self.parser = Pix2TextParser(device='cuda:' + device)
 
     def load(self, **kwargs: Optional[Any]) -> List[Document]:
         """Load file."""
         blob = Blob.from_path(self.file_path)
-        return self.parser.parse(blob)
\ No newline at end of file
+        return self.parser.parse(blob)
+
+    def lazy_load(self, **kwargs: Optional[Any]) -> Iterator[Document]:
+        """Lazily load file page by page."""
+        blob = Blob.from_path(self.file_path)
+        yield from self.parser.lazy_parse(blob)
\ No newline at end of file
@@ -1,6 +1,7 @@
 """Tests for the various PDF parsers."""
-from typing import Iterator
+from typing import Iterator, Optional
 
+import numpy as np
 import pytest
 
 from langchain.document_loaders.base import BaseBlobParser
@@ -10,6 +11,7 @@ from langchain.document_loaders.parsers.pdf import (
     PyMuPDFParser,
     PyPDFium2Parser,
     PyPDFParser,
+    _order_body,
 )
 from tests.data import HELLO_PDF, LAYOUT_PARSER_PAPER_PDF
 
@@ -77,3 +79,110 @@ def test_pypdfium2_parser() -> None:
     """Test PyPDFium2 parser."""
     # Does not follow defaults to split by page.
     _assert_with_parser(PyPDFium2Parser())
+
+
+def _box(x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+    """Corner-point position in the pix2text layout format."""
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+
+
+def _block(text: str, box: Optional[np.ndarray] = None) -> dict:
+    out = {"type": "Text", "text": text}
+    if box is not None:
+        out["position"] = box
+    return out
+
+
+def test_order_body_two_column_reorder() -> None:
+    """Left column reads before the right column on a two-column page."""
+    outs = [
+        _block("T", _box(10, 5, 90, 10)),  # title spans the midline
+        _block("L1", _box(5, 20, 45, 30)),
+        _block("R1", _box(55, 15, 95, 25)),
+        _block("L2", _box(5, 40, 45, 50)),
+        _block("R2", _box(55, 40, 95, 50)),
+    ]
+    assert _order_body(outs) == ["T", "L1", "L2", "R1", "R2"]
+
+
+def test_order_body_crossing_box_opens_band() -> None:
+    """A midline-crossing block flushes the columns above it."""
+    outs = [
+        _block("T", _box(10, 5, 90, 10)),
+        _block("L1", _box(5, 20, 45, 30)),
+        _block("R1", _box(55, 20, 95, 30)),
+        _block("M", _box(10, 50, 90, 55)),  # full-width figure mid-page
+        _block("L2", _box(5, 60, 45, 70)),
+        _block("R2", _box(55, 60, 95, 70)),
+    ]
+    assert _order_body(outs) == ["T", "L1", "R1", "M", "L2", "R2"]
+
+
+def test_order_body_single_column_passthrough() -> None:
+    """Full-width blocks keep the model's order."""
+    outs = [
+        _block(text, _box(10, 10 * i, 90, 10 * i + 8))
+        for i, text in enumerate(["a", "b", "c", "d", "e"])
+    ]
+    assert _order_body(outs) == ["a", "b", "c", "d", "e"]
+
+
+def test_order_body_too_few_blocks_passthrough() -> None:
+    """Fewer than four blocks are never reordered."""
+    outs = [
+        _block("L", _box(5, 20, 45, 30)),
+        _block("R", _box(55, 10, 95, 20)),
+        _block("L2", _box(5, 40, 45, 50)),
+    ]
+    assert _order_body(outs) == ["L", "R", "L2"]
+
+
+@pytest.mark.requires("pypdfium2")
+def test_pix2text_parser_page_without_header(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A page with no Header or Footer blocks must still join cleanly.
+
+    Regression test: the block bucketing once crashed with "dictionary
+    changed size during iteration" on exactly this shape of page.
+    """
+    import sys
+    import types
+
+    from langchain.document_loaders.parsers import pdf as pdf_module
+
+    fake_pix2text = types.ModuleType("pix2text")
+
+    class FakePix2Text:
+        def __init__(self, **kwargs: object) -> None:
+            pass
+
+        def __call__(self, img: object, resized_shape: int = 0) -> list:
+            return [{"type": "Text", "text": "body"}]
+
+    fake_pix2text.Pix2Text = FakePix2Text  # type: ignore[attr-defined]
+
+    fake_torch = types.ModuleType("torch")
+    fake_torch.cuda = types.SimpleNamespace(  # type: ignore[attr-defined]
+        is_available=lambda: False
+    )
+
+    monkeypatch.setitem(sys.modules, "pix2text", fake_pix2text)
+    monkeypatch.setitem(sys.modules, "torch", fake_torch)
+    monkeypatch.setattr(pdf_module, "_P2T_CACHE", {})
+
+    docs = list(pdf_module.Pix2TextParser().lazy_parse(Blob.from_path(HELLO_PDF)))
+    assert len(docs) == 1
+    assert docs[0].page_content == "\n\nbody\n\n\n\n"
+
+
+def test_order_body_missing_position_passthrough() -> None:
+    """Blocks without position information keep the model's order."""
+    outs = [
+        _block("T", _box(10, 5, 90, 10)),
+        _block("L1", _box(5, 20, 45, 30)),
+        _block("R1", _box(55, 15, 95, 25)),
+        _block("L2", _box(5, 40, 45, 50)),
+        _block("R2"),  # no position
+    ]
+    assert _order_body(outs) == ["T", "L1", "R1", "L2", "R2"]
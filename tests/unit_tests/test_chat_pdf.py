@@ -0,0 +1,35 @@
+"""Tests for the chat_pdf driver script."""
+from pathlib import Path
+
+import pytest
+
+from chat_pdf import extract_text_layer
+from tests.data import HELLO_PDF, LAYOUT_PARSER_PAPER_PDF
+
+# A true scan: no extractable text layer at all.
+_SCAN_PDF = Path(__file__).parents[2] / "1685435898.9404118_herd-scharfstein.pdf"
+
+
+@pytest.mark.requires("pypdfium2")
+def test_extract_text_layer_born_digital() -> None:
+    """A born-digital pdf returns its text layer and skips OCR."""
+    text = extract_text_layer(str(LAYOUT_PARSER_PAPER_PDF))
+    assert text is not None
+    assert "LayoutParser" in text
+
+
+@pytest.mark.requires("pypdfium2")
+def test_extract_text_layer_scan() -> None:
+    """A scanned pdf has no text layer and is routed to OCR."""
+    assert extract_text_layer(str(_SCAN_PDF)) is None
+
+
+@pytest.mark.requires("pypdfium2")
+def test_extract_text_layer_below_threshold() -> None:
+    """Pages under the chars-per-page threshold are routed to OCR."""
+    # hello.pdf has a text layer but far fewer than 200 chars on its page.
+    assert extract_text_layer(str(HELLO_PDF)) is None
+    # With the threshold relaxed the same file returns its text.
+    text = extract_text_layer(str(HELLO_PDF), min_chars_per_page=5)
+    assert text is not None
+    assert text.startswith("Hello world!")